@@ -16,6 +16,7 @@
 
 import os
 import math
+import shutil
 import tempfile
 import sqlite3
 import pandas
@@ -34,14 +35,102 @@ def exec_db(file: str, commands: list):
     connection.commit()
     connection.close()
 
-def read_db(file: str, command):
+def read_db(file: str, command, compact = False):
     """Read from DB and return results of query"""
     print("\nFetching data from DB...")
     connection = sqlite3.connect(file)
     results = pandas.read_sql_query(command, connection)
     connection.close()
+    if compact: results = compact_dtypes(results)
     return results
 
+def read_db_chunks(file: str, command, chunksize = 5000, compact = False):
+    """
+    Read from DB in chunks of rows instead of all at once.
+    The query runs right away so errors show up before any output,
+    then the returned iterator fetches one DataFrame per chunk.
+    """
+    print("\nFetching data from DB...")
+    connection = sqlite3.connect(file)
+    try:
+        cursor = connection.execute(command)
+    except Exception:
+        connection.close()
+        raise
+    return fetch_chunks(connection, cursor, chunksize, compact)
+
+def fetch_chunks(connection, cursor, chunksize: int, compact = False):
+    """
+    Yield query results from cursor as DataFrames of up to chunksize rows.
+    Always yields at least one (possibly empty) chunk so column names are kept.
+    Later chunks are cast to the dtypes of the first one so output is formatted the same.
+    Closes the DB connection when done.
+    """
+    try:
+        columns = [c[0] for c in cursor.description or []]
+        rows = cursor.fetchmany(chunksize)
+        offset = 0
+        dtypes = None
+        while True:
+            chunk = pandas.DataFrame.from_records(rows, columns = columns, coerce_float = True)
+            chunk.index = range(offset, offset + len(rows)) # Keep row numbers continuous across chunks
+            offset += len(rows)
+            if dtypes is None: dtypes = list(chunk.dtypes)
+            else: match_dtypes(chunk, dtypes)
+            if compact: chunk = compact_dtypes(chunk)
+            yield chunk
+            rows = cursor.fetchmany(chunksize)
+            if not rows: break
+    finally:
+        cursor.close()
+        connection.close()
+
+def match_dtypes(chunk: pandas.DataFrame, dtypes: list):
+    """
+    Cast columns of chunk to the given dtypes, in place.
+    Integer columns become nullable Int64 so NULLs don't turn them into floats.
+    Columns that can't be cast safely (e.g. decimals in an integer column) keep their own dtype.
+    """
+    for i, dtype in enumerate(dtypes):
+        column = chunk.iloc[:, i]
+        if column.dtype == dtype: continue
+        if pandas.api.types.is_integer_dtype(dtype): dtype = 'Int64'
+        try:
+            chunk.isetitem(i, column.astype(dtype))
+        except (ValueError, TypeError):
+            pass
+
+def compact_dtypes(table: pandas.DataFrame):
+    """
+    Shrink DataFrame memory use: prices and indicators to float32, symbols to categorical.
+    Other columns such as volume are left alone, since float32 only keeps ~7 digits.
+    """
+    prices = ['open', 'high', 'low', 'close', 'close_price', 'SMA50', 'RSI',
+              'MACD', 'signal', 'PEratio', 'EarnYield']
+    for col in table.columns:
+        if col in prices:
+            table[col] = pandas.to_numeric(table[col], downcast = 'float')
+        elif col == 'symbol':
+            table[col] = table[col].astype('category')
+    return table
+
+def print_paged(chunks, col_space = 12):
+    """Print chunks of query results to the terminal one screen at a time"""
+    page_rows = max(shutil.get_terminal_size().lines - 2, 1) # Leave room for header and prompt
+    page = 0
+    for chunk in chunks:
+        if chunk.empty and page == 0:
+            print(chunk.to_string()) # No rows, still show the column names
+            return
+        for start in range(0, len(chunk), page_rows):
+            if page > 0:
+                more = input("-- More -- (Enter to continue, 'q' to stop) ")
+                if more in ['q','Q']:
+                    chunks.close() # Stop reading and close the DB connection
+                    return
+            print(chunk.iloc[start:start + page_rows].to_string(col_space = col_space))
+            page += 1
+
 def get_symbol(file: str, symbol = 0):
     """View available stock symbols in DB to query and allow user to select one"""
     if symbol != 0: return symbol # Bypass if a stock symbol was previously chosen
@@ -61,14 +150,18 @@ def get_symbol(file: str, symbol = 0):
         else:
             print("Invalid choice.")
 
-def output_editor(output: pandas.DataFrame):
+def output_editor(output):
     """
     Output results to CSV file and open it with default app.
     Will open in Excel assuming it is your default CSV editor.
+    Output may be a single DataFrame or chunks from read_db_chunks,
+    in which case the CSV is written one chunk at a time.
     """
-    tmpfile = tempfile.NamedTemporaryFile(suffix = '.csv', delete = False)
+    if isinstance(output, pandas.DataFrame): output = [output]
+    with tempfile.NamedTemporaryFile(mode = 'w', suffix = '.csv', newline = '', encoding = 'utf-8', delete = False) as tmpfile:
+        for n, chunk in enumerate(output):
+            chunk.to_csv(tmpfile, header = (n == 0))
     print("Opening " + tmpfile.name + " in external editor.")
-    output.to_csv(tmpfile.name)
     os.startfile(tmpfile.name)
 
 def visualizer(raw_data: pandas.DataFrame, style: int):
@@ -172,6 +265,7 @@ def main():
     symbol = 0
     external = 'N'
     visualize = 'Y'
+    compact = 'N'
 
     while(True):
         print("\nMenu:")
@@ -185,6 +279,7 @@ def main():
         print("C: Custom query (Ex.: SELECT * FROM stocks LIMIT 100;)")
         print("X: Open in external editor? (Currently: " + external + ")")
         print("V: Create graph of results? (Currently: " + visualize + ")")
+        print("D: Use compact data types for results? (Currently: " + compact + ")")
         print("Q: Quit")
         choice = input("Input choice: ")
 
@@ -198,7 +293,7 @@ def main():
                       "FROM stocks stk "
                       "INNER JOIN (SELECT symbol, MAX(datetime) AS date FROM stocks GROUP BY symbol) last "
                       "ON stk.symbol = last.symbol AND stk.datetime = last.date;")
-            table = read_db(file_db, sqlcmd)
+            table = read_db(file_db, sqlcmd, compact = compact in ['y','Y'])
             print("Most recent daily prices for stock in DB:")
             if external in ['y','Y']: output_editor(table)
             else: print(table)
@@ -213,7 +308,7 @@ def main():
                     "LEFT JOIN vw_rsi AS rsi ON stk.symbol = rsi.symbol AND stk.datetime = rsi.close_date "
                     "LEFT JOIN vw_macd2 AS macd ON stk.symbol = macd.symbol AND stk.datetime = macd.close_date "
                     f"WHERE stk.symbol = '{symbol}' ORDER BY datetime DESC LIMIT 126;")
-            table = read_db(file_db, sqlcmd)
+            table = read_db(file_db, sqlcmd, compact = compact in ['y','Y'])
             print("OVerview for " + symbol)
             if external in ['y','Y']: output_editor(table)
             else: print(table.to_string())
@@ -221,32 +316,32 @@ def main():
         elif choice == "4":
             symbol = get_symbol(file_db, symbol)
             sqlcmd = f"SELECT * FROM vw_SMA WHERE symbol = '{symbol}' ORDER BY close_date DESC LIMIT 252;"
-            table = read_db(file_db, sqlcmd)
+            table = read_db_chunks(file_db, sqlcmd, compact = compact in ['y','Y'])
             print("Simple Moving Averages:")
             if external in ['y','Y']: output_editor(table)
-            else: print(table.to_string())
+            else: print_paged(table)
         elif choice == "5":
             symbol = get_symbol(file_db, symbol)
             sqlcmd = (f"SELECT * FROM vw_rsi WHERE symbol = '{symbol}' LIMIT 252;")
-            table = read_db(file_db, sqlcmd)
+            table = read_db_chunks(file_db, sqlcmd, compact = compact in ['y','Y'])
             print("RSI 14d Report:")
             if external in ['y','Y']: output_editor(table)
-            else: print(table.to_string())
+            else: print_paged(table)
         elif choice == "6":
             symbol = get_symbol(file_db, symbol)
             sqlcmd = (f"SELECT * FROM vw_macd2 WHERE symbol = '{symbol}' LIMIT 252;")
-            table = read_db(file_db, sqlcmd)
+            table = read_db_chunks(file_db, sqlcmd, compact = compact in ['y','Y'])
             print("MACD 12d-26d w/ 9d Signal:")
             if external in ['y','Y']: output_editor(table)
-            else: print(table.to_string())
+            else: print_paged(table)
         elif choice in ['c','C']:
             print("Custom SQL query: ")
             sqlcmd = input("-> ")
             try:
-                table = read_db(file_db, sqlcmd)
+                table = read_db_chunks(file_db, sqlcmd, compact = compact in ['y','Y'])
                 print("Results of: " + sqlcmd)
                 if external in ['y','Y']: output_editor(table)
-                else: print(table.to_string())
+                else: print_paged(table)
             except Exception as ex:
                 print(ex)
                 pass
@@ -260,6 +355,11 @@ def main():
             print("(This will use the default browser or app set for HTML files.)")
             visualize = input("Input 'y' or 'Y' for YES, any other for NO: ")
             if visualize not in ['y','Y']: visualize = 'N'
+        elif choice in ['d','D']:
+            print("Use compact data types for results? ")
+            print("(Prices stored as float32 and symbols as categories to save memory.)")
+            compact = input("Input 'y' or 'Y' for YES, any other for NO: ")
+            if compact not in ['y','Y']: compact = 'N'
         else:
             print("Invalid choice.")
 